@@ -10,13 +10,19 @@ macOS: Uses FSEvents
 """
 
 import argparse
+import fnmatch
+import heapq
 import os
+import re
 import sys
+import threading
 import time
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+from collections import Counter, deque
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice, takewhile
 from pathlib import Path
-from typing import Deque, Dict, List, Optional, Set
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 from rich.console import Console
 from rich.layout import Layout
@@ -24,20 +30,69 @@ from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
-from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+# Directory sizes are kept up to date from per-event deltas; a full rescan
+# only happens this often (seconds) to correct drift from files that existed
+# before we started watching and whose previous size is therefore unknown
+DIR_SIZE_RESYNC_INTERVAL = 30.0
+
+# Event types recorded by DirectoryChangeTracker
+EVENT_TYPES = ("created", "modified", "deleted", "moved", "moved_to")
+
+# How often the background recorder thread processes queued events (seconds);
+# repeated events on a path within one interval are merged into one update
+RECORD_INTERVAL = 0.1
+
+# The only events the tracker handles. The observer drops everything else (such
+# as the opened/closed events inotify reports for every file read) before it
+# reaches the event queue, so bursts of reads don't compete with real changes.
+WATCHED_EVENTS = [
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+]
+
+
+BYTE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
+BYTE_DIVISORS = tuple(1024**i for i in range(len(BYTE_UNITS)))
+
+# Maximum number of paths whose exclude decision is remembered
+EXCLUDE_CACHE_SIZE = 4096
+
+# Exclude patterns of the form "*.ext" (e.g. "*.log", "*.tar.gz"); these are
+# matched with a suffix check on the path instead of the regex
+EXTENSION_PATTERN = re.compile(r"\*(\.[^*?\[\]/\\]+)")
 
 
 def human_bytes(n: int) -> str:
     """Convert bytes to human readable format"""
-    step = 1024.0
-    units = ["B", "KB", "MB", "GB", "TB", "PB"]
-    f = float(n)
-    for u in units:
-        if f < step:
-            return f"{f:.1f} {u}" if u != "B" else f"{int(f)} {u}"
-        f /= step
-    return f"{f:.1f} EB"
+    n = int(n)
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    if n < 1024:
+        return f"{sign}{n} B"
+    # Every unit is 2**10 times the previous one, so the bit length picks it
+    idx = min((n.bit_length() - 1) // 10, len(BYTE_UNITS) - 1)
+    return f"{sign}{n / BYTE_DIVISORS[idx]:.1f} {BYTE_UNITS[idx]}"
 
 
 def get_dir_size(path: str) -> int:
@@ -47,15 +102,44 @@ def get_dir_size(path: str) -> int:
         with os.scandir(path) as it:
             for entry in it:
                 try:
+                    # is_file() is answered from the directory listing (or a
+                    # cached lstat), so this costs at most one stat syscall per file
                     if entry.is_file(follow_symlinks=False):
                         total += entry.stat(follow_symlinks=False).st_size
-                except (PermissionError, FileNotFoundError, OSError):
+                except OSError:
                     continue
-    except (PermissionError, FileNotFoundError, OSError):
+    except OSError:
         pass
     return total
 
 
+@lru_cache(maxsize=65536)
+def _dirname(path: str) -> str:
+    """Directory of a file path, cached since events repeat on a few hot files"""
+    # Interned so every file in a directory yields the same key object for
+    # dirs, _dir_rows and _dirty_dirs
+    return sys.intern(os.path.dirname(path))
+
+
+def _abs_size_delta(row: tuple) -> int:
+    """Sort key for get_changed_dirs rows: size of the change in either direction"""
+    return abs(row[4])
+
+
+class DirStat:
+    """Aggregated change statistics for a single directory"""
+
+    __slots__ = ("count", "last", "size", "initial_size", "delta", "scanned")
+
+    def __init__(self, size: int, scanned: float):
+        self.count = 0  # number of change events
+        self.last = 0.0  # last change time (monotonic)
+        self.size = size  # current size
+        self.initial_size = size  # size when first seen
+        self.delta = 0  # cumulative size change
+        self.scanned = scanned  # time of last full scan (monotonic)
+
+
 class DirectoryChangeTracker(FileSystemEventHandler):
     """Tracks filesystem changes and aggregates them by directory with size tracking"""
 
@@ -64,194 +148,440 @@ class DirectoryChangeTracker(FileSystemEventHandler):
         console: Console,
         max_history: int = 1000,
         exclude_patterns: Optional[List[str]] = None,
+        render_event_count: int = 0,
     ):
         super().__init__()
         self.console = console
         self.max_history = max_history
         self.exclude_patterns = exclude_patterns or []
 
+        # Plain "*.ext" globs are checked as suffixes and literal paths with a
+        # set lookup; all other globs are compiled once into a single
+        # case-insensitive regex (same semantics as fnmatch.fnmatch on the
+        # lowercased path, without per-event translation or lowercasing)
+        exclude_exts = set()
+        exclude_literals = set()
+        exclude_globs = []
+        for pattern in self.exclude_patterns:
+            pattern = os.path.normcase(pattern)
+            extension = EXTENSION_PATTERN.fullmatch(pattern)
+            if extension is not None:
+                exclude_exts.add(extension.group(1).lower())
+            elif not any(c in pattern for c in "*?["):
+                exclude_literals.add(pattern.lower())
+            else:
+                exclude_globs.append(pattern)
+        self._exclude_exts = tuple(sorted(exclude_exts))
+        self._exclude_ext_len = max(map(len, exclude_exts), default=0)
+        self._exclude_literals = frozenset(exclude_literals)
+        if exclude_globs:
+            self._exclude_re = re.compile(
+                "|".join(f"(?:{fnmatch.translate(p)})" for p in exclude_globs),
+                re.IGNORECASE,
+            )
+        else:
+            self._exclude_re = None
+        # path -> excluded, for the hot paths that keep producing events
+        self._exclude_cache: Dict[str, bool] = {}
+        if not self.exclude_patterns:
+            # Nothing can match, so skip the lookups entirely
+            self._is_excluded = self._never_excluded
+
         # Track changes by directory
-        self.dir_changes: Dict[str, int] = defaultdict(int)  # dir -> change count
-        self.dir_last_change: Dict[str, datetime] = {}  # dir -> last change time
-        self.dir_sizes: Dict[str, int] = {}  # dir -> current size
-        self.dir_initial_sizes: Dict[str, int] = {}  # dir -> size when first seen
-        self.dir_size_deltas: Dict[str, int] = {}  # dir -> cumulative size change
+        self.dirs: Dict[str, DirStat] = {}  # dir -> aggregated statistics
+
+        # Result rows of get_changed_dirs, only rebuilt for dirs changed since.
+        # Both dicts are kept ordered by last change (oldest first), so time
+        # window queries can stop at the first row older than the cutoff.
+        self._dir_rows: Dict[str, tuple] = {}  # dir -> (dir, count, last, size, delta)
+        self._dirty_dirs: Dict[str, None] = {}
 
         # Track individual file sizes to calculate proper deltas
         self.file_sizes: Dict[str, int] = {}  # file_path -> last known size
 
+        # Raw events queued by the watchdog thread, recorded in batches by
+        # process_pending (from the recorder thread, see start)
+        # (monotonic, type, path, is_dir)
+        self._pending: Deque[tuple] = deque()
+
         # Recent events queue
         self.recent_events: Deque[tuple] = deque(
             maxlen=max_history
-        )  # (time, type, path, size_delta)
+        )  # (monotonic, wallclock, type, path, size_delta)
+
+        # Just the newest events for the recent events table (if it is shown)
+        self.render_events: Optional[Deque[tuple]] = (
+            deque(maxlen=render_event_count) if render_event_count > 0 else None
+        )
 
         # Statistics
         self.total_events = 0
-        self.event_counts = defaultdict(int)  # event_type -> count
+        # event_type -> count, with every known type present from the start
+        self.event_counts: Counter = Counter(dict.fromkeys(EVENT_TYPES, 0))
         self.excluded_events = 0  # Count of excluded events
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
+        # Size delta calculation per event type, one dict lookup per change
+        self._delta_handlers = {
+            "created": self._added_delta,
+            "modified": self._modified_delta,
+            "deleted": self._removed_delta,
+            "moved": self._removed_delta,
+            "moved_to": self._added_delta,
+        }
+
+        # Serializes recording (process_pending/flush). Draining the queue,
+        # stat calls and directory scans only run under this lock, so file_sizes
+        # is private to it and dirs is only ever written while holding it.
+        self._record_lock = threading.Lock()
+        # Guards the aggregated state the display reads; recording only holds
+        # it to apply a batch's already computed results
+        self.lock = threading.Lock()
+        self._recorder: Optional[threading.Thread] = None
+        self._stop_recorder = threading.Event()
+        # Set whenever process_pending has recorded changes and cleared by
+        # wait_for_changes, for callers that want to wake up on new data
+        # instead of polling
+        self._changes_recorded = threading.Event()
+
+    @staticmethod
+    def _never_excluded(path: str) -> bool:
+        """Exclude check used when there are no exclude patterns"""
+        return False
 
     def _is_excluded(self, path: str) -> bool:
-        """Check if path matches any exclude pattern"""
-        import fnmatch
-
-        for pattern in self.exclude_patterns:
-            if fnmatch.fnmatch(path.lower(), pattern.lower()):
+        """Check if path matches any exclude pattern, remembering the answer"""
+        cache = self._exclude_cache
+        excluded = cache.get(path)
+        if excluded is None:
+            excluded = self._match_excludes(path)
+            if len(cache) >= EXCLUDE_CACHE_SIZE:
+                # Forget the oldest decision (dicts keep insertion order)
+                del cache[next(iter(cache))]
+            cache[path] = excluded
+        return excluded
+
+    def clear_exclude_cache(self):
+        """Forget remembered exclude decisions (needed if the patterns change)"""
+        self._exclude_cache.clear()
+
+    def _match_excludes(self, path: str) -> bool:
+        """Check path against the exclude patterns"""
+        if self._exclude_exts:
+            # One C-level endswith over all suffixes; only the tail that could
+            # hold one is lowercased
+            tail = path[-self._exclude_ext_len :].lower()
+            if tail.endswith(self._exclude_exts):
                 return True
-        return False
-
-    def _record_change(self, event_type: str, path: str):
-        """Record a filesystem change and calculate size delta"""
-        now = datetime.now()
-
-        # Ensure path is string
-        path = str(path) if isinstance(path, bytes) else path
-
-        # Check if excluded
-        if self._is_excluded(path):
-            self.excluded_events += 1
-            return
-
-        # Determine the directory and file
-        is_dir = os.path.isdir(path)
-        if is_dir:
-            directory = path
-            file_path = None
-        else:
-            directory = os.path.dirname(path)
-            file_path = path
-
-        # Calculate size delta
-        size_delta = 0
-        if file_path:
-            try:
-                if event_type == "created":
-                    # New file - full size is the delta
-                    if os.path.exists(file_path):
-                        new_size = os.path.getsize(file_path)
-                        size_delta = new_size
-                        self.file_sizes[file_path] = new_size
-
-                elif event_type == "modified":
-                    # Modified file - calculate actual difference
-                    if os.path.exists(file_path):
-                        new_size = os.path.getsize(file_path)
-                        old_size = self.file_sizes.get(
-                            file_path, new_size
-                        )  # If unknown, assume no change
-                        size_delta = new_size - old_size
-                        self.file_sizes[file_path] = new_size
-
-                elif event_type == "deleted":
-                    # Deleted file - negative delta
-                    old_size = self.file_sizes.get(file_path, 0)
-                    size_delta = -old_size
-                    if file_path in self.file_sizes:
-                        del self.file_sizes[file_path]
-
-                elif event_type == "moved":
-                    # File moved away - treat as deletion
-                    old_size = self.file_sizes.get(file_path, 0)
-                    size_delta = -old_size
-                    if file_path in self.file_sizes:
-                        del self.file_sizes[file_path]
-
-                elif event_type == "moved_to":
-                    # File moved here - treat as creation
-                    if os.path.exists(file_path):
-                        new_size = os.path.getsize(file_path)
-                        size_delta = new_size
-                        self.file_sizes[file_path] = new_size
-
-            except (PermissionError, FileNotFoundError, OSError):
-                # If we can't access the file, ignore size delta
+        path = os.path.normcase(path)
+        if self._exclude_literals and path.lower() in self._exclude_literals:
+            return True
+        return self._exclude_re is not None and self._exclude_re.match(path) is not None
+
+    def _queue_change(self, event_type: str, path: str, is_dir: bool):
+        """Queue a raw event; the expensive bookkeeping happens in process_pending"""
+        self._pending.append((time.monotonic(), event_type, path, is_dir))
+
+    def process_pending(self) -> int:
+        """Record queued events, coalescing everything that happened to a path"""
+        with self._record_lock:
+            return self._record_pending()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Record everything queued so far; False if the lock wasn't free in time"""
+        # The recorder thread may be in the middle of a batch holding the lock
+        if not self._record_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        try:
+            self._record_pending()
+        finally:
+            self._record_lock.release()
+        return True
+
+    def _record_pending(self) -> int:
+        """Drain and record the queue (caller holds _record_lock)"""
+        # Wall clock minus monotonic clock, taken per batch (the monotonic
+        # clock stops during suspend and ignores NTP steps) so event times
+        # don't need a wall clock read per raw event
+        wallclock_offset = time.time() - time.monotonic()
+        # (path, is_dir) -> [last monotonic, [raw event types in order]]
+        batch: Dict[tuple, list] = {}
+        # This loop runs once per raw event, so keep it to local lookups
+        pending = self._pending
+        next_event = pending.popleft
+        take_entry = batch.pop
+        while pending:
+            now, event_type, path, is_dir = next_event()
+            key = (path, is_dir)
+            entry = take_entry(key, None)
+            if entry is None:
+                entry = [now, [event_type]]
+            else:
+                entry[0] = now
+                entry[1].append(event_type)
+            # Re-insert so the batch stays ordered by each path's latest event
+            batch[key] = entry
+
+        # Work out every change without holding self.lock: the stat calls and
+        # directory scans can be slow (network drives, large new directories)
+        changes = []
+        excluded = 0
+        # Directories whose size changed in ways we have no delta for; they
+        # are rescanned in this batch rather than waiting for their next event
+        stale: Set[str] = set()
+        compute = self._compute_change
+        for (path, is_dir), (now, types) in batch.items():
+            if self._is_excluded(path):
+                excluded += len(types)
+                # Excluded files still count towards their directory's size
+                directory = sys.intern(path) if is_dir else _dirname(path)
+                if directory in self.dirs:
+                    stale.add(directory)
+                continue
+            # Reduce the path's events to their net effect: created then
+            # modified is still a creation, anything ending in a delete or
+            # move away is a removal
+            first = types[0]
+            last = types[-1]
+            if last in ("deleted", "moved") or first not in ("created", "moved_to"):
+                event_type = last
+            else:
+                event_type = first
+            directory, size_delta = compute(event_type, path, is_dir)
+            if size_delta is None:
+                stale.add(directory)
                 size_delta = 0
+            changes.append((event_type, path, directory, now, types, size_delta))
+        scans = self._scan_dirs(changes, stale)
+
+        # Then apply the results in one short critical section
+        with self.lock:
+            self.excluded_events += excluded
+            self._apply_changes(changes, scans, wallclock_offset)
+        if batch:
+            self._changes_recorded.set()
+        return len(batch)
+
+    def wait_for_changes(self, timeout: Optional[float] = None) -> bool:
+        """Block until changes are recorded since the last wake-up; False on timeout"""
+        if not self._changes_recorded.wait(timeout):
+            return False
+        # Clear before the caller reads the state, so later changes wake it again
+        self._changes_recorded.clear()
+        return True
+
+    def start(self, interval: float = RECORD_INTERVAL):
+        """Record queued events on a background thread every `interval` seconds"""
+        self._stop_recorder.clear()
+        self._recorder = threading.Thread(
+            target=self._run_recorder, args=(interval,), daemon=True
+        )
+        self._recorder.start()
+
+    def stop(self):
+        """Stop the recorder thread and record whatever is still queued"""
+        if self._recorder is not None:
+            self._stop_recorder.set()
+            self._recorder.join()
+            self._recorder = None
+        self.process_pending()
+
+    def _run_recorder(self, interval: float):
+        while not self._stop_recorder.wait(interval):
+            self.process_pending()
+
+    def _added_delta(self, file_path: str) -> int:
+        """New file (created or moved here) - full size, less anything it replaced"""
+        new_size = os.stat(file_path).st_size
+        size_delta = new_size - self.file_sizes.get(file_path, 0)
+        self.file_sizes[file_path] = new_size
+        return size_delta
+
+    def _modified_delta(self, file_path: str) -> Optional[int]:
+        """Modified file - difference from the last known size (None if unknown)"""
+        new_size = os.stat(file_path).st_size
+        old_size = self.file_sizes.get(file_path)
+        self.file_sizes[file_path] = new_size
+        return None if old_size is None else new_size - old_size
+
+    def _removed_delta(self, file_path: str) -> Optional[int]:
+        """File deleted or moved away - negative of its last known size (or None)"""
+        old_size = self.file_sizes.pop(file_path, None)
+        return None if old_size is None else -old_size
+
+    def _compute_change(
+        self, event_type: str, path: str, is_dir: bool
+    ) -> Tuple[str, Optional[int]]:
+        """Directory and size delta of a path's net change
+
+        The delta is None when it can't be known (a file that existed before
+        we started watching, or one we can't stat); the directory then has
+        to be rescanned.
+        """
+        if is_dir:
+            # A directory that was deleted or moved away no longer holds its
+            # files, whose sizes we mostly never saw
+            return sys.intern(path), (None if event_type in ("deleted", "moved") else 0)
+        try:
+            size_delta = self._delta_handlers[event_type](path)
+        except OSError:
+            # The file is gone or we can't access it
+            size_delta = None
+        return _dirname(path), size_delta
+
+    def _scan_dirs(
+        self, changes: List[tuple], stale: Set[str]
+    ) -> Dict[str, Tuple[float, int]]:
+        """Scan directories that are new, stale or due for a resync"""
+        scans: Dict[str, Tuple[float, int]] = {}
+        dirs = self.dirs
+        for directory in stale:
+            scans[directory] = (time.monotonic(), get_dir_size(directory))
+        for _, _, directory, now, _, _ in changes:
+            if directory in scans:
+                continue
+            stat = dirs.get(directory)
+            if stat is None or now - stat.scanned >= DIR_SIZE_RESYNC_INTERVAL:
+                scanned = time.monotonic()
+                scans[directory] = (scanned, get_dir_size(directory))
+        return scans
+
+    def _apply_changes(
+        self,
+        changes: List[tuple],
+        scans: Dict[str, Tuple[float, int]],
+        wallclock_offset: float,
+    ):
+        """Apply a batch's computed changes to the statistics (caller holds lock)"""
+        dirs = self.dirs
+        for directory, (scanned, size) in scans.items():
+            stat = dirs.get(directory)
+            if stat is None:
+                dirs[directory] = DirStat(size, scanned)
+            else:
+                stat.size = size
+                stat.scanned = scanned
+
+        dirty_dirs = self._dirty_dirs
+        for event_type, path, directory, now, types, size_delta in changes:
+            # Update statistics
+            self.total_events += len(types)
+            # Counter.update tallies an iterable in C
+            self.event_counts.update(types)
+
+            # Events are recorded in batches, so a scan already includes every
+            # change that happened before it; only later changes add their delta
+            stat = dirs[directory]
+            if now > stat.scanned:
+                stat.size += size_delta
+            stat.count += len(types)
+            stat.last = now
+            stat.delta += size_delta
+            dirty_dirs.pop(directory, None)
+            dirty_dirs[directory] = None
+
+            # Add to recent events with size delta
+            event = (now, now + wallclock_offset, event_type, path, size_delta)
+            self.recent_events.append(event)
+            if self.render_events is not None:
+                self.render_events.append(event)
+
+        # Directories rescanned without a change of their own (e.g. only
+        # excluded files changed) keep their place, just with the new size
+        rows = self._dir_rows
+        for directory in scans:
+            if directory not in dirty_dirs and directory in rows:
+                stat = dirs[directory]
+                rows[directory] = (
+                    directory,
+                    stat.count,
+                    stat.last,
+                    stat.size,
+                    stat.delta,
+                )
 
-        # Update statistics
-        self.total_events += 1
-        self.event_counts[event_type] += 1
-        self.dir_changes[directory] += 1
-        self.dir_last_change[directory] = now
-
-        # Track cumulative size delta for this directory
-        if directory not in self.dir_size_deltas:
-            self.dir_size_deltas[directory] = 0
-        self.dir_size_deltas[directory] += size_delta
-
-        # Update directory size
-        if os.path.isdir(directory):
-            try:
-                current_size = get_dir_size(directory)
-                if directory not in self.dir_initial_sizes:
-                    self.dir_initial_sizes[directory] = current_size
-                self.dir_sizes[directory] = current_size
-            except:
-                pass
-
-        # Add to recent events with size delta
-        self.recent_events.append((now, event_type, path, size_delta))
-
+    # Event paths are str because main() schedules the observer with a str root
     def on_created(self, event: FileSystemEvent):
-        self._record_change("created", str(event.src_path))
+        self._queue_change("created", event.src_path, event.is_directory)
 
     def on_deleted(self, event: FileSystemEvent):
-        self._record_change("deleted", str(event.src_path))
+        self._queue_change("deleted", event.src_path, event.is_directory)
 
     def on_modified(self, event: FileSystemEvent):
-        self._record_change("modified", str(event.src_path))
+        self._queue_change("modified", event.src_path, event.is_directory)
 
     def on_moved(self, event: FileSystemEvent):
-        self._record_change("moved", str(event.src_path))
+        self._queue_change("moved", event.src_path, event.is_directory)
         if hasattr(event, "dest_path"):
-            self._record_change("moved_to", str(event.dest_path))
+            # The destination is the same kind of entry as the source
+            self._queue_change("moved_to", event.dest_path, event.is_directory)
 
-    def get_changed_dirs(self, since_minutes: Optional[int] = None) -> list:
+    def get_changed_dirs(
+        self, since_minutes: Optional[int] = None, top: Optional[int] = None
+    ) -> list:
         """Get directories that changed, sorted by absolute size delta (biggest changes first)"""
-        if since_minutes is None:
-            # Return all, sorted by absolute size delta
-            items = [
-                (
-                    d,
-                    self.dir_changes[d],
-                    self.dir_last_change[d],
-                    self.dir_sizes.get(d, 0),
-                    self.dir_size_deltas.get(d, 0),
-                )
-                for d in self.dir_changes.keys()
-            ]
-            # Sort by absolute value of size delta (biggest changes on top)
-            items.sort(key=lambda x: abs(x[4]), reverse=True)
-            return items
-
-        # Filter by time window
-        cutoff = datetime.now() - timedelta(minutes=since_minutes)
-        items = [
-            (
-                d,
-                self.dir_changes[d],
-                self.dir_last_change[d],
-                self.dir_sizes.get(d, 0),
-                self.dir_size_deltas.get(d, 0),
-            )
-            for d in self.dir_changes.keys()
-            if self.dir_last_change[d] >= cutoff
-        ]
-        # Sort by absolute value of size delta
-        items.sort(key=lambda x: abs(x[4]), reverse=True)
-        return items
+        with self.lock:
+            # Refresh the rows of directories that changed since the last call
+            # and move them to the end, keeping the rows ordered by last change
+            rows = self._dir_rows
+            for d in self._dirty_dirs:
+                stat = self.dirs[d]
+                rows.pop(d, None)
+                rows[d] = (d, stat.count, stat.last, stat.size, stat.delta)
+            self._dirty_dirs.clear()
+
+            items = rows.values()
+            if since_minutes is not None:
+                # Filter by time window, newest first until the first older row
+                cutoff = time.monotonic() - since_minutes * 60
+                items = takewhile(lambda row: row[2] >= cutoff, reversed(items))
+
+            # Sort by absolute value of size delta (biggest changes on top); when
+            # only the top entries are needed, select them without a full sort
+            if top is None:
+                return sorted(items, key=_abs_size_delta, reverse=True)
+            return heapq.nlargest(top, items, key=_abs_size_delta)
 
     def get_recent_events(self, count: int = 20) -> list:
         """Get the most recent events"""
-        return list(self.recent_events)[-count:]
+        with self.lock:
+            render_events = self.render_events
+            if render_events is not None and count == render_events.maxlen:
+                return list(render_events)
+
+            # Walk back from the newest event so this costs O(count), not
+            # O(max_history), then restore oldest-first order
+            events = list(islice(reversed(self.recent_events), count))
+        events.reverse()
+        return events
+
+
+@lru_cache(maxsize=4096)
+def format_dir_cells(
+    size_delta: int, count: int, current_size: int, directory: str
+) -> Tuple[Text, Text, Text, Text]:
+    """Build the cells of a directory row (cached, quiet rows are reused as-is)"""
+    # Format size delta with color
+    if size_delta > 0:
+        delta_text = Text(f"+{human_bytes(size_delta)}", style="green")
+    elif size_delta < 0:
+        delta_text = Text(human_bytes(abs(size_delta)), style="red")
+    else:
+        delta_text = Text("0 B", style="dim")
+
+    return (
+        delta_text,
+        Text(str(count)),
+        Text(human_bytes(current_size) if current_size > 0 else "-"),
+        Text(directory),
+    )
 
 
 def create_display(tracker: DirectoryChangeTracker, args) -> Panel:
     """Create the display panel"""
 
     # Header with statistics
-    now = datetime.now()
-    runtime = now - tracker.start_time
-    runtime_str = f"{int(runtime.total_seconds())}s"
+    now = time.monotonic()
+    runtime_str = f"{int(now - tracker.start_time)}s"
 
     # Time window display
     if args.minutes is None:
@@ -271,10 +601,10 @@ def create_display(tracker: DirectoryChangeTracker, args) -> Panel:
     header.add_row("Time Window:", window_str)
 
     # Event type breakdown
-    if tracker.event_counts:
-        event_summary = ", ".join(
-            [f"{k}: {v}" for k, v in tracker.event_counts.items()]
-        )
+    with tracker.lock:
+        event_counts = [(k, v) for k, v in tracker.event_counts.items() if v]
+    if event_counts:
+        event_summary = ", ".join([f"{k}: {v}" for k, v in event_counts])
         header.add_row("Event Types:", event_summary)
 
     # Recent events table (only if --show-events flag is used)
@@ -290,10 +620,9 @@ def create_display(tracker: DirectoryChangeTracker, args) -> Panel:
         recent_table.add_column("Size Δ", justify="right", width=10)
         recent_table.add_column("Path", overflow="fold")
 
-        for event_time, event_type, path, size_delta in tracker.get_recent_events(
-            args.event_count
-        ):
-            time_str = event_time.strftime("%H:%M:%S")
+        recent_events = tracker.get_recent_events(args.event_count)
+        for _, wallclock, event_type, path, size_delta in recent_events:
+            time_str = datetime.fromtimestamp(wallclock).strftime("%H:%M:%S")
 
             # Color code by event type
             if event_type == "created":
@@ -318,7 +647,7 @@ def create_display(tracker: DirectoryChangeTracker, args) -> Panel:
             recent_table.add_row(time_str, type_str, delta_str, path)
 
     # Changed directories table
-    changed_dirs = tracker.get_changed_dirs(args.minutes)[: args.top]
+    changed_dirs = tracker.get_changed_dirs(args.minutes, args.top)
 
     # Title for directories table
     if args.minutes is None:
@@ -337,26 +666,15 @@ def create_display(tracker: DirectoryChangeTracker, args) -> Panel:
 
     for directory, count, last_change, current_size, size_delta in changed_dirs:
         ago = now - last_change
-        if ago.total_seconds() < 60:
-            ago_str = f"{int(ago.total_seconds())}s"
+        if ago < 60:
+            ago_str = f"{int(ago)}s"
         else:
-            ago_str = f"{int(ago.total_seconds() / 60)}m"
+            ago_str = f"{int(ago / 60)}m"
 
-        # Format size delta with color
-        if size_delta > 0:
-            delta_str = f"[green]+{human_bytes(size_delta)}[/green]"
-        elif size_delta < 0:
-            delta_str = f"[red]{human_bytes(abs(size_delta))}[/red]"
-        else:
-            delta_str = "[dim]0 B[/dim]"
-
-        dirs_table.add_row(
-            delta_str,
-            str(count),
-            human_bytes(current_size) if current_size > 0 else "-",
-            ago_str,
-            directory,
+        delta_text, count_text, size_text, dir_text = format_dir_cells(
+            size_delta, count, current_size, directory
         )
+        dirs_table.add_row(delta_text, count_text, size_text, ago_str, dir_text)
 
     # Combine everything
     layout = Table.grid(padding=(1, 0))
@@ -428,6 +746,21 @@ def main():
         default=1000,
         help="Maximum number of events to keep in history (Default: 1000)",
     )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Detect changes by rescanning every SECONDS instead of using OS "
+        "events (for network drives that don't report changes)",
+    )
+    parser.add_argument(
+        "--coalesce",
+        type=float,
+        default=RECORD_INTERVAL,
+        help="Window in seconds in which repeated events on the same path are "
+        f"merged into one update (Default: {RECORD_INTERVAL})",
+    )
 
     args = parser.parse_args()
 
@@ -439,6 +772,14 @@ def main():
         print(f"Error: '{root}' is not a directory.", file=sys.stderr)
         sys.exit(1)
 
+    if args.coalesce <= 0:
+        print("Error: --coalesce must be greater than 0.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.poll is not None and args.poll <= 0:
+        print("Error: --poll must be greater than 0.", file=sys.stderr)
+        sys.exit(1)
+
     console = Console()
 
     console.print(
@@ -456,10 +797,23 @@ def main():
     )
 
     # Create tracker and observer
-    tracker = DirectoryChangeTracker(console, args.max_history, args.exclude)
-    observer = Observer()
-    observer.schedule(tracker, root, recursive=args.recursive)
+    tracker = DirectoryChangeTracker(
+        console,
+        args.max_history,
+        args.exclude,
+        args.event_count if args.show_events else 0,
+    )
+    # OS events cost nothing while idle; polling stats every watched file on
+    # each pass, but also sees changes made on NFS/SMB shares by other hosts
+    if args.poll is not None:
+        observer = PollingObserver(timeout=args.poll)
+    else:
+        observer = Observer()
+    observer.schedule(
+        tracker, root, recursive=args.recursive, event_filter=WATCHED_EVENTS
+    )
     observer.start()
+    tracker.start(args.coalesce)
 
     console.print("[green]✓ Filesystem watcher started - waiting for events...[/green]")
     if args.exclude:
@@ -479,14 +833,15 @@ def main():
         console.print("\n[yellow]Stopping watcher...[/yellow]")
         observer.stop()
         observer.join()
+        tracker.stop()
 
         console.print(
             Panel.fit(
                 f"[bold green]Watch Session Summary[/bold green]\n\n"
                 f"Total Events: [cyan]{tracker.total_events}[/cyan]\n"
                 f"Excluded Events: [dim]{tracker.excluded_events}[/dim]\n"
-                f"Directories Changed: [cyan]{len(tracker.dir_changes)}[/cyan]\n"
-                f"Runtime: [cyan]{(datetime.now() - tracker.start_time).total_seconds():.1f}s[/cyan]",
+                f"Directories Changed: [cyan]{len(tracker.dirs)}[/cyan]\n"
+                f"Runtime: [cyan]{time.monotonic() - tracker.start_time:.1f}s[/cyan]",
                 border_style="cyan",
             )
         )
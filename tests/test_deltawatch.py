@@ -7,9 +7,8 @@ Test suite for deltawatch.py
 import os
 import sys
 import tempfile
+import threading
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
@@ -20,13 +19,26 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from rich.console import Console
 from watchdog.events import (
     DirCreatedEvent,
+    DirDeletedEvent,
     FileCreatedEvent,
     FileDeletedEvent,
     FileModifiedEvent,
     FileMovedEvent,
 )
 
-from deltawatch import DirectoryChangeTracker, get_dir_size, human_bytes
+from deltawatch import (
+    DirectoryChangeTracker,
+    format_dir_cells,
+    get_dir_size,
+    human_bytes,
+)
+
+
+@pytest.fixture(scope="class")
+def temp_base():
+    """Provide one temporary directory shared by all tests of a class"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
 
 
 class TestHumanBytes:
@@ -57,6 +69,16 @@ class TestHumanBytes:
         result = human_bytes(1024**5)  # 1 PB
         assert "PB" in result
 
+        result = human_bytes(1024**6)  # 1 EB
+        assert result == "1.0 EB"
+
+        assert human_bytes(1024**8) == "1.0 YB"
+        assert human_bytes(1024**9) == "1024.0 YB"  # Largest unit caps out
+
+    def test_negative_numbers(self):
+        assert human_bytes(-100) == "-100 B"
+        assert human_bytes(-1536) == "-1.5 KB"
+
 
 class TestGetDirSize:
     """Test the get_dir_size function"""
@@ -72,11 +94,9 @@ class TestGetDirSize:
             file1 = os.path.join(tmpdir, "test1.txt")
             file2 = os.path.join(tmpdir, "test2.txt")
 
-            with open(file1, "w") as f:
-                f.write("a" * 100)  # 100 bytes
+            Path(file1).write_bytes(b"a" * 100)  # 100 bytes
 
-            with open(file2, "w") as f:
-                f.write("b" * 200)  # 200 bytes
+            Path(file2).write_bytes(b"b" * 200)  # 200 bytes
 
             size = get_dir_size(tmpdir)
             assert size == 300
@@ -86,15 +106,13 @@ class TestGetDirSize:
         with tempfile.TemporaryDirectory() as tmpdir:
             # Create file in main directory
             file1 = os.path.join(tmpdir, "main.txt")
-            with open(file1, "w") as f:
-                f.write("a" * 100)
+            Path(file1).write_bytes(b"a" * 100)
 
             # Create subdirectory with file
             subdir = os.path.join(tmpdir, "subdir")
             os.makedirs(subdir)
             file2 = os.path.join(subdir, "sub.txt")
-            with open(file2, "w") as f:
-                f.write("b" * 200)
+            Path(file2).write_bytes(b"b" * 200)
 
             # Should only count main.txt, not sub.txt
             size = get_dir_size(tmpdir)
@@ -106,6 +124,28 @@ class TestGetDirSize:
         assert size == 0
 
 
+class TestFormatDirCells:
+    """Test the format_dir_cells function"""
+
+    def test_cells(self):
+        delta, count, size, directory = format_dir_cells(1024, 3, 2048, "/tmp/[x]")
+        assert delta.plain == "+1.0 KB"
+        assert str(delta.style) == "green"
+        assert count.plain == "3"
+        assert size.plain == "2.0 KB"
+        assert directory.plain == "/tmp/[x]"  # Not interpreted as markup
+
+    def test_negative_and_zero(self):
+        delta, _, size, _ = format_dir_cells(-2048, 1, 0, "/tmp")
+        assert delta.plain == "2.0 KB"
+        assert str(delta.style) == "red"
+        assert size.plain == "-"
+        assert format_dir_cells(0, 1, 0, "/tmp")[0].plain == "0 B"
+
+    def test_cached(self):
+        assert format_dir_cells(1, 1, 1, "/tmp") is format_dir_cells(1, 1, 1, "/tmp")
+
+
 class TestDirectoryChangeTracker:
     """Test the DirectoryChangeTracker class"""
 
@@ -120,72 +160,76 @@ class TestDirectoryChangeTracker:
         return DirectoryChangeTracker(console, max_history=100)
 
     @pytest.fixture
-    def temp_dir(self):
-        """Provide a temporary directory for tests"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            yield tmpdir
+    def temp_dir(self, temp_base, request):
+        """Provide an empty directory per test inside the shared one"""
+        path = temp_base / request.node.name
+        path.mkdir()
+        return str(path)
 
     def test_initialization(self, tracker):
         """Test tracker initializes correctly"""
         assert tracker.total_events == 0
-        assert len(tracker.dir_changes) == 0
+        assert len(tracker.dirs) == 0
         assert len(tracker.recent_events) == 0
-        assert isinstance(tracker.event_counts, defaultdict)
+        assert tracker.event_counts == dict.fromkeys(
+            ("created", "modified", "deleted", "moved", "moved_to"), 0
+        )
 
     def test_file_creation_tracking(self, tracker, temp_dir):
         """Test tracking file creation events"""
         test_file = os.path.join(temp_dir, "test.txt")
 
         # Create actual file for size calculation
-        with open(test_file, "w") as f:
-            f.write("test content")
+        Path(test_file).write_bytes(b"test content")
 
         # Simulate file creation event
         event = FileCreatedEvent(test_file)
         tracker.on_created(event)
+        tracker.process_pending()
 
         assert tracker.total_events == 1
         assert tracker.event_counts["created"] == 1
-        assert temp_dir in tracker.dir_changes
-        assert tracker.dir_changes[temp_dir] == 1
+        assert temp_dir in tracker.dirs
+        assert tracker.dirs[temp_dir].count == 1
 
     def test_file_deletion_tracking(self, tracker, temp_dir):
         """Test tracking file deletion events"""
         test_file = os.path.join(temp_dir, "test.txt")
 
         # First create and track the file
-        with open(test_file, "w") as f:
-            f.write("test content" * 10)
+        Path(test_file).write_bytes(b"test content" * 10)
 
         event = FileCreatedEvent(test_file)
         tracker.on_created(event)
+        tracker.process_pending()
 
         # Now delete it
         os.remove(test_file)
         event = FileDeletedEvent(test_file)
         tracker.on_deleted(event)
+        tracker.process_pending()
 
         assert tracker.total_events == 2
         assert tracker.event_counts["deleted"] == 1
-        assert tracker.dir_changes[temp_dir] == 2
+        assert tracker.dirs[temp_dir].count == 2
 
     def test_file_modification_tracking(self, tracker, temp_dir):
         """Test tracking file modification events"""
         test_file = os.path.join(temp_dir, "test.txt")
 
         # Create file
-        with open(test_file, "w") as f:
-            f.write("initial")
+        Path(test_file).write_bytes(b"initial")
 
         event = FileCreatedEvent(test_file)
         tracker.on_created(event)
+        tracker.process_pending()
 
         # Modify file
-        with open(test_file, "w") as f:
-            f.write("modified content")
+        Path(test_file).write_bytes(b"modified content")
 
         event = FileModifiedEvent(test_file)
         tracker.on_modified(event)
+        tracker.process_pending()
 
         assert tracker.total_events == 2
         assert tracker.event_counts["modified"] == 1
@@ -196,18 +240,144 @@ class TestDirectoryChangeTracker:
         dest_file = os.path.join(temp_dir, "destination.txt")
 
         # Create source file
-        with open(src_file, "w") as f:
-            f.write("content")
+        Path(src_file).write_bytes(b"content")
 
         # Simulate move event
         event = FileMovedEvent(src_file, dest_file)
         tracker.on_moved(event)
+        tracker.process_pending()
 
         # Should record both moved and moved_to events
         assert tracker.total_events == 2
         assert tracker.event_counts["moved"] == 1
         assert tracker.event_counts["moved_to"] == 1
 
+    def test_repeated_events_are_coalesced(self, tracker, temp_dir):
+        """Test that repeats of the same event are recorded as one update"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"content")
+
+        for _ in range(3):
+            tracker.on_modified(FileModifiedEvent(test_file))
+
+        assert tracker.total_events == 0  # Nothing recorded until processed
+        assert tracker.process_pending() == 1
+
+        assert tracker.total_events == 3
+        assert tracker.event_counts["modified"] == 3
+        assert tracker.dirs[temp_dir].count == 3
+        assert len(tracker.recent_events) == 1
+
+    def test_events_on_path_reduced_to_net_effect(self, tracker, temp_dir):
+        """Test that a created-then-modified file is one creation at its final size"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"x" * 100)
+
+        tracker.on_created(FileCreatedEvent(test_file))
+        for _ in range(5):
+            tracker.on_modified(FileModifiedEvent(test_file))
+        assert tracker.process_pending() == 1
+
+        assert tracker.total_events == 6
+        assert tracker.event_counts["created"] == 1
+        assert tracker.event_counts["modified"] == 5
+        assert tracker.dirs[temp_dir].delta == 100
+        assert tracker.recent_events[0][2] == "created"
+
+    def test_created_then_deleted_has_no_size_effect(self, tracker, temp_dir):
+        """Test that a file created and deleted in one batch leaves size unchanged"""
+        test_file = os.path.join(temp_dir, "test.txt")
+
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.on_deleted(FileDeletedEvent(test_file))
+        tracker.process_pending()
+
+        assert tracker.total_events == 2
+        assert tracker.dirs[temp_dir].delta == 0
+        assert tracker.recent_events[0][2] == "deleted"
+        assert test_file not in tracker.file_sizes
+
+    def test_background_recorder(self, tracker, temp_dir):
+        """Test that the recorder thread processes queued events"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"content")
+
+        tracker.start(interval=0.01)
+        try:
+            tracker.on_created(FileCreatedEvent(test_file))
+            assert tracker.wait_for_changes(timeout=5)
+            assert tracker.total_events == 1
+        finally:
+            tracker.stop()
+
+    def test_flush(self, tracker, temp_dir):
+        """Test that flush records queued events unless the lock stays busy"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        tracker.on_created(FileCreatedEvent(test_file))
+
+        with tracker._record_lock:  # Simulate the recorder thread in a long batch
+            assert not tracker.flush(timeout=0.01)
+        assert tracker.total_events == 0
+
+        assert tracker.flush(timeout=5)
+        assert tracker.total_events == 1
+
+    def test_wait_for_changes(self, tracker, temp_dir):
+        """Test that each wake-up only reports changes recorded since the last one"""
+        assert not tracker.wait_for_changes(timeout=0.01)
+
+        tracker.on_created(FileCreatedEvent(os.path.join(temp_dir, "a.txt")))
+        tracker.process_pending()
+        assert tracker.wait_for_changes(timeout=0.01)
+        assert not tracker.wait_for_changes(timeout=0.01)  # Nothing new since
+
+        tracker.process_pending()  # Empty queue records nothing
+        assert not tracker.wait_for_changes(timeout=0.01)
+
+    def test_display_not_blocked_by_slow_stat(self, tracker, temp_dir, monkeypatch):
+        """Test that reading results doesn't wait for a batch's stat calls"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"content")
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+
+        started = threading.Event()
+        release = threading.Event()
+        real_stat = os.stat
+
+        def slow_stat(path, *args, **kwargs):
+            if path == test_file:
+                started.set()
+                release.wait(5)
+            return real_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", slow_stat)
+        tracker.on_modified(FileModifiedEvent(test_file))
+        recorder = threading.Thread(target=tracker.process_pending)
+        recorder.start()
+        try:
+            assert started.wait(5)
+            begin = time.monotonic()
+            tracker.get_changed_dirs()
+            tracker.get_recent_events()
+            assert time.monotonic() - begin < 1
+        finally:
+            release.set()
+            recorder.join()
+        assert tracker.total_events == 2
+
+    def test_stop_records_remaining_events(self, tracker, temp_dir):
+        """Test that stopping the recorder records events still queued"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"content")
+
+        tracker.start(interval=60)
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.stop()
+
+        assert tracker.total_events == 1
+        assert tracker.dirs[temp_dir].delta == 7
+
     def test_directory_creation_tracking(self, tracker, temp_dir):
         """Test tracking directory creation"""
         new_dir = os.path.join(temp_dir, "newdir")
@@ -215,9 +385,10 @@ class TestDirectoryChangeTracker:
 
         event = DirCreatedEvent(new_dir)
         tracker.on_created(event)
+        tracker.process_pending()
 
         assert tracker.total_events == 1
-        assert new_dir in tracker.dir_changes
+        assert new_dir in tracker.dirs
 
     def test_exclusion_patterns(self, console, temp_dir):
         """Test that exclusion patterns work correctly"""
@@ -227,67 +398,234 @@ class TestDirectoryChangeTracker:
         test_file = os.path.join(temp_dir, "test.txt")
         tmp_file = os.path.join(temp_dir, "temp.tmp")
 
-        with open(test_file, "w") as f:
-            f.write("normal")
-        with open(tmp_file, "w") as f:
-            f.write("temporary")
+        Path(test_file).write_bytes(b"normal")
+        Path(tmp_file).write_bytes(b"temporary")
 
         # Track both
         tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
         tracker.on_created(FileCreatedEvent(tmp_file))
+        tracker.process_pending()
 
         assert tracker.total_events == 1  # Only test.txt should be counted
         assert tracker.excluded_events == 1  # temp.tmp should be excluded
 
+    def test_exclusion_patterns_case_insensitive(self, console, temp_dir):
+        """Test that all patterns are matched regardless of case"""
+        tracker = DirectoryChangeTracker(console, exclude_patterns=["*.TMP", "*Cache*"])
+
+        assert tracker._is_excluded(os.path.join(temp_dir, "temp.tmp"))
+        assert tracker._is_excluded(os.path.join(temp_dir, "CACHE", "data.bin"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "test.txt"))
+
+    def test_exclusion_patterns_combined(self, console, temp_dir):
+        """Test that combined patterns each still match the whole path"""
+        tracker = DirectoryChangeTracker(
+            console, exclude_patterns=["*.log", "*build+[0-9]*", "*/out"]
+        )
+
+        assert tracker._is_excluded(os.path.join(temp_dir, "app.log"))
+        assert tracker._is_excluded(os.path.join(temp_dir, "build+1", "a.o"))
+        assert tracker._is_excluded(os.path.join(temp_dir, "out"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "app.log.txt"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "buildd1", "a.o"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "out", "a.txt"))
+
+    def test_exclusion_extension_and_literal_patterns(self, console, temp_dir):
+        """Test the fast paths for "*.ext" and literal path patterns"""
+        literal = os.path.join(temp_dir, "keep", "skip.txt")
+        tracker = DirectoryChangeTracker(
+            console, exclude_patterns=["*.tmp", "*.tar.GZ", literal]
+        )
+
+        assert tracker._exclude_re is None  # No general globs to compile
+        assert tracker._is_excluded(os.path.join(temp_dir, "a.TMP"))
+        assert tracker._is_excluded(os.path.join(temp_dir, "x.tmp.tmp"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "a.tmp.txt"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "dir.tmp", "a.txt"))
+        assert tracker._is_excluded(os.path.join(temp_dir, "src.tar.gz"))
+        assert not tracker._is_excluded(os.path.join(temp_dir, "src.gz"))
+        assert tracker._is_excluded(literal)
+        assert not tracker._is_excluded(os.path.join(temp_dir, "skip.txt"))
+
+    def test_no_exclusion_patterns(self, tracker, temp_dir):
+        """Test that nothing is excluded or cached without patterns"""
+        assert not tracker._is_excluded(os.path.join(temp_dir, "temp.tmp"))
+        assert tracker._exclude_cache == {}
+
+    def test_exclusion_decisions_cached(self, console, temp_dir, monkeypatch):
+        """Test that repeated paths reuse the remembered exclude decision"""
+        import deltawatch
+
+        monkeypatch.setattr(deltawatch, "EXCLUDE_CACHE_SIZE", 2)
+        tracker = DirectoryChangeTracker(console, exclude_patterns=["*cache*"])
+        paths = [os.path.join(temp_dir, name) for name in ("cache", "a", "b")]
+
+        assert tracker._is_excluded(paths[0])
+        tracker.exclude_patterns = []
+        tracker._exclude_re = None
+        assert tracker._is_excluded(paths[0])  # Still answered from the cache
+
+        tracker._is_excluded(paths[1])
+        tracker._is_excluded(paths[2])
+        assert list(tracker._exclude_cache) == paths[1:]  # Oldest dropped
+
+        tracker.clear_exclude_cache()
+        assert not tracker._is_excluded(paths[0])
+
+    def test_directory_keys_shared(self, tracker, temp_dir):
+        """Test that events from different files reuse one directory key object"""
+        for name in ("a.txt", "b.txt"):
+            tracker.on_created(FileCreatedEvent(os.path.join(temp_dir, name)))
+            tracker.process_pending()
+
+        (key,) = tracker.dirs
+        (dirty_key,) = tracker._dirty_dirs  # Re-inserted by the b.txt event
+        assert dirty_key is key
+
     def test_get_changed_dirs(self, tracker, temp_dir):
         """Test retrieving changed directories"""
         # Create events in the directory
         test_file = os.path.join(temp_dir, "test.txt")
-        with open(test_file, "w") as f:
-            f.write("content")
+        Path(test_file).write_bytes(b"content")
 
         tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
 
         changed = tracker.get_changed_dirs()
         assert len(changed) == 1
         assert changed[0][0] == temp_dir
         assert changed[0][1] == 1  # event count
 
-    def test_get_changed_dirs_with_time_filter(self, tracker, temp_dir):
+    def test_get_changed_dirs_reflects_new_events(self, tracker, temp_dir):
+        """Test that rows are refreshed for directories that changed again"""
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"a" * 100)
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+        assert tracker.get_changed_dirs()[0][1] == 1
+
+        Path(test_file).write_bytes(b"a" * 300)
+        tracker.on_modified(FileModifiedEvent(test_file))
+        tracker.process_pending()
+
+        changed = tracker.get_changed_dirs()
+        assert changed[0][1] == 2  # event count
+        assert changed[0][4] == 300  # size delta
+
+    def test_get_changed_dirs_top(self, tracker, temp_dir):
+        """Test that only the directories with the biggest changes are returned"""
+        for name, size in (("small", 10), ("large", 1000), ("medium", 100)):
+            subdir = os.path.join(temp_dir, name)
+            os.makedirs(subdir)
+            test_file = os.path.join(subdir, "test.txt")
+            Path(test_file).write_bytes(b"a" * size)
+            tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+
+        changed = tracker.get_changed_dirs(top=2)
+        assert [os.path.basename(row[0]) for row in changed] == ["large", "medium"]
+        assert len(tracker.get_changed_dirs()) == 3
+
+    def test_get_changed_dirs_with_time_filter(self, tracker, temp_dir, monkeypatch):
         """Test time-based filtering of changed directories"""
         test_file = os.path.join(temp_dir, "test.txt")
-        with open(test_file, "w") as f:
-            f.write("content")
+        Path(test_file).write_bytes(b"content")
 
         # Create event
         tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
 
         # Should be visible with 1 minute window
         changed = tracker.get_changed_dirs(since_minutes=1)
         assert len(changed) == 1
 
-        # Manually adjust the timestamp to be old
-        tracker.dir_last_change[temp_dir] = datetime.now() - timedelta(minutes=10)
+        # Move the clock 10 minutes ahead so the change is old
+        later = time.monotonic() + 10 * 60
+        monkeypatch.setattr(time, "monotonic", lambda: later)
 
         # Should not be visible with 1 minute window
         changed = tracker.get_changed_dirs(since_minutes=1)
         assert len(changed) == 0
 
+    def test_get_changed_dirs_time_filter_keeps_recent(
+        self, tracker, temp_dir, monkeypatch
+    ):
+        """Test that only directories changed within the window are returned"""
+        old_dir = os.path.join(temp_dir, "old")
+        new_dir = os.path.join(temp_dir, "new")
+        for d in (old_dir, new_dir):
+            os.makedirs(d)
+
+        tracker.on_created(FileCreatedEvent(os.path.join(old_dir, "test.txt")))
+        tracker.process_pending()
+        tracker.get_changed_dirs()
+
+        # Move the clock 10 minutes ahead before the next change
+        later = time.monotonic() + 10 * 60
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        tracker.on_created(FileCreatedEvent(os.path.join(new_dir, "test.txt")))
+        tracker.process_pending()
+
+        changed = tracker.get_changed_dirs(since_minutes=1)
+        assert [row[0] for row in changed] == [new_dir]
+        assert len(tracker.get_changed_dirs()) == 2
+
     def test_recent_events_queue(self, tracker, temp_dir):
         """Test that recent events are stored correctly"""
         # Create multiple events
         for i in range(5):
             test_file = os.path.join(temp_dir, f"test{i}.txt")
-            with open(test_file, "w") as f:
-                f.write(f"content {i}")
+            Path(test_file).write_bytes(f"content {i}".encode())
             tracker.on_created(FileCreatedEvent(test_file))
+            tracker.process_pending()
 
         recent = tracker.get_recent_events(count=3)
         assert len(recent) == 3
 
-        # Check structure: (time, type, path, size_delta)
-        assert len(recent[0]) == 4
-        assert recent[0][1] == "created"
+        # Check structure: (monotonic, wallclock, type, path, size_delta)
+        assert len(recent[0]) == 5
+        assert recent[0][2] == "created"
+        assert abs(recent[-1][1] - time.time()) < 5
+        # Oldest first, ending with the newest event
+        assert recent == list(tracker.recent_events)[-3:]
+
+    def test_event_wallclock_follows_clock_jumps(self, tracker, temp_dir, monkeypatch):
+        """Test that a wall clock jump (suspend, NTP step) only affects later events"""
+        tracker.on_created(FileCreatedEvent(os.path.join(temp_dir, "a.txt")))
+        tracker.process_pending()
+
+        real_time = time.time
+        monkeypatch.setattr(time, "time", lambda: real_time() + 3600)
+        tracker.on_created(FileCreatedEvent(os.path.join(temp_dir, "b.txt")))
+        tracker.process_pending()
+
+        before, after = tracker.recent_events
+        assert abs(before[1] - real_time()) < 5  # Unchanged by the jump
+        assert abs(after[1] - (real_time() + 3600)) < 5
+
+    def test_render_events(self, console, temp_dir):
+        """Test that the render deque only keeps the events shown in the table"""
+        tracker = DirectoryChangeTracker(console, render_event_count=3)
+
+        for i in range(5):
+            test_file = os.path.join(temp_dir, f"test{i}.txt")
+            Path(test_file).write_bytes(f"content {i}".encode())
+            tracker.on_created(FileCreatedEvent(test_file))
+            tracker.process_pending()
+
+        assert len(tracker.render_events) == 3
+        recent = tracker.get_recent_events(count=3)
+        assert [os.path.basename(e[3]) for e in recent] == [
+            "test2.txt",
+            "test3.txt",
+            "test4.txt",
+        ]
+        assert len(tracker.get_recent_events(count=5)) == 5  # Falls back to history
+
+    def test_render_events_disabled_by_default(self, tracker):
+        """Test that no render deque is allocated unless requested"""
+        assert tracker.render_events is None
 
     def test_max_history_limit(self, console):
         """Test that event history respects max_history limit"""
@@ -297,9 +635,9 @@ class TestDirectoryChangeTracker:
             # Create more events than max_history
             for i in range(10):
                 test_file = os.path.join(tmpdir, f"test{i}.txt")
-                with open(test_file, "w") as f:
-                    f.write(f"content {i}")
+                Path(test_file).write_bytes(f"content {i}".encode())
                 tracker.on_created(FileCreatedEvent(test_file))
+                tracker.process_pending()
 
             # Only last 5 should be kept
             assert len(tracker.recent_events) == 5
@@ -307,49 +645,161 @@ class TestDirectoryChangeTracker:
     def test_size_delta_calculation_create(self, tracker, temp_dir):
         """Test that size deltas are calculated correctly for file creation"""
         test_file = os.path.join(temp_dir, "test.txt")
-        content = "a" * 1000  # 1000 bytes
+        content = b"a" * 1000  # 1000 bytes
 
-        with open(test_file, "w") as f:
-            f.write(content)
+        Path(test_file).write_bytes(content)
 
         tracker.on_created(FileCreatedEvent(test_file))
+        assert tracker.flush(timeout=5)
 
         # Check that size delta was recorded
-        assert temp_dir in tracker.dir_size_deltas
-        assert tracker.dir_size_deltas[temp_dir] == 1000
+        assert temp_dir in tracker.dirs
+        assert tracker.dirs[temp_dir].delta == 1000
 
     def test_size_delta_calculation_modify(self, tracker, temp_dir):
         """Test size deltas for file modifications"""
         test_file = os.path.join(temp_dir, "test.txt")
 
         # Create initial file
-        with open(test_file, "w") as f:
-            f.write("a" * 100)
+        Path(test_file).write_bytes(b"a" * 100)
         tracker.on_created(FileCreatedEvent(test_file))
+        assert tracker.flush(timeout=5)
 
         # Modify to larger size
-        with open(test_file, "w") as f:
-            f.write("b" * 200)
+        Path(test_file).write_bytes(b"b" * 200)
         tracker.on_modified(FileModifiedEvent(test_file))
+        assert tracker.flush(timeout=5)
 
         # Delta should be 100 (initial) + 100 (increase) = 200
-        assert tracker.dir_size_deltas[temp_dir] == 200
+        assert tracker.dirs[temp_dir].delta == 200
 
     def test_size_delta_calculation_delete(self, tracker, temp_dir):
         """Test size deltas for file deletion"""
         test_file = os.path.join(temp_dir, "test.txt")
 
         # Create file
-        with open(test_file, "w") as f:
-            f.write("a" * 500)
+        Path(test_file).write_bytes(b"a" * 500)
         tracker.on_created(FileCreatedEvent(test_file))
+        assert tracker.flush(timeout=5)
 
         # Delete file
         os.remove(test_file)
         tracker.on_deleted(FileDeletedEvent(test_file))
+        assert tracker.flush(timeout=5)
 
         # Delta should be 500 (create) - 500 (delete) = 0
-        assert tracker.dir_size_deltas[temp_dir] == 0
+        assert tracker.dirs[temp_dir].delta == 0
+
+    def test_batched_creates_in_new_directory(self, tracker, temp_dir):
+        """Test that a first-sight scan isn't added to by events it already saw"""
+        for i in range(5):
+            test_file = os.path.join(temp_dir, f"test{i}.txt")
+            Path(test_file).write_bytes(b"a" * 100)
+            tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+
+        assert tracker.dirs[temp_dir].size == get_dir_size(temp_dir) == 500
+        assert tracker.dirs[temp_dir].delta == 500
+
+    def test_dir_size_updated_incrementally(self, tracker, temp_dir, monkeypatch):
+        """Test that the directory is scanned once and then updated from deltas"""
+        import deltawatch
+
+        scans = []
+        real_get_dir_size = deltawatch.get_dir_size
+        monkeypatch.setattr(
+            deltawatch,
+            "get_dir_size",
+            lambda path: scans.append(path) or real_get_dir_size(path),
+        )
+
+        for i, size in enumerate((100, 200, 300)):
+            test_file = os.path.join(temp_dir, f"test{i}.txt")
+            Path(test_file).write_bytes(b"a" * size)
+            tracker.on_created(FileCreatedEvent(test_file))
+            tracker.process_pending()
+
+        assert scans == [temp_dir]
+        assert tracker.dirs[temp_dir].size == 600
+
+    def test_dir_size_includes_excluded_files(self, console, temp_dir):
+        """Test that excluded files still count towards the directory size"""
+        tracker = DirectoryChangeTracker(console, exclude_patterns=["*.tmp"])
+        for name, size in (("a.txt", 100), ("b.tmp", 1000), ("c.txt", 10)):
+            test_file = os.path.join(temp_dir, name)
+            Path(test_file).write_bytes(b"a" * size)
+            tracker.on_created(FileCreatedEvent(test_file))
+            tracker.process_pending()
+            # Quiet directories are rescanned right away, not on their next event
+            assert tracker.dirs[temp_dir].size == get_dir_size(temp_dir)
+
+        assert tracker.dirs[temp_dir].size == 1110
+        assert [row[3] for row in tracker.get_changed_dirs()] == [1110]
+
+    def test_dir_size_follows_excluded_file_changes(self, console, temp_dir):
+        """Test that changes to excluded files after the scan reach the size"""
+        tracker = DirectoryChangeTracker(console, exclude_patterns=["*.tmp"])
+        test_file = os.path.join(temp_dir, "test.txt")
+        Path(test_file).write_bytes(b"a" * 10)
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+
+        excluded_file = os.path.join(temp_dir, "test.tmp")
+        Path(excluded_file).write_bytes(b"a" * 1000)
+        tracker.on_created(FileCreatedEvent(excluded_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == 1010
+
+        Path(excluded_file).write_bytes(b"a" * 3000)
+        tracker.on_modified(FileModifiedEvent(excluded_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == 3010
+
+        os.remove(excluded_file)
+        tracker.on_deleted(FileDeletedEvent(excluded_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == 10
+        # Excluded changes affect the size but are neither counted nor listed
+        assert tracker.dirs[temp_dir].count == 1
+        assert tracker.excluded_events == 3
+
+    def test_dir_size_with_preexisting_file(self, tracker, temp_dir):
+        """Test that changes to files that existed before watching are counted"""
+        old_file = os.path.join(temp_dir, "a.txt")
+        Path(old_file).write_bytes(b"a" * 100)
+        new_file = os.path.join(temp_dir, "c.txt")
+        Path(new_file).write_bytes(b"a" * 10)
+        tracker.on_created(FileCreatedEvent(new_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == 110
+
+        Path(old_file).write_bytes(b"a" * 5000)
+        tracker.on_modified(FileModifiedEvent(old_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == get_dir_size(temp_dir) == 5010
+
+        os.remove(old_file)
+        tracker.on_deleted(FileDeletedEvent(old_file))
+        tracker.process_pending()
+        assert tracker.dirs[temp_dir].size == get_dir_size(temp_dir) == 10
+
+    def test_deleted_directory_size(self, tracker, temp_dir):
+        """Test that a deleted directory doesn't keep its last size"""
+        sub_dir = os.path.join(temp_dir, "sub")
+        os.makedirs(sub_dir)
+        Path(os.path.join(sub_dir, "old.txt")).write_bytes(b"a" * 100)
+        test_file = os.path.join(sub_dir, "test.txt")
+        Path(test_file).write_bytes(b"a" * 10)
+        tracker.on_created(FileCreatedEvent(test_file))
+        tracker.process_pending()
+        assert tracker.dirs[sub_dir].size == 110
+
+        for name in os.listdir(sub_dir):
+            os.remove(os.path.join(sub_dir, name))
+        os.rmdir(sub_dir)
+        tracker.on_deleted(DirDeletedEvent(sub_dir))
+        tracker.process_pending()
+        assert tracker.dirs[sub_dir].size == 0
 
 
 class TestCLIArgumentParsing:
@@ -375,6 +825,7 @@ class TestIntegration:
     def test_watch_and_detect_changes(self):
         """Test that the watcher can detect real filesystem changes"""
         from watchdog.observers import Observer
+        from watchdog.observers.polling import PollingObserver
 
         console = Console()
         tracker = DirectoryChangeTracker(console)
@@ -383,9 +834,15 @@ class TestIntegration:
             # Resolve symlinks (important for macOS where /var -> /private/var)
             tmpdir_real = os.path.realpath(tmpdir)
 
-            observer = Observer()
+            # DELTAWATCH_FORCE_POLL=1 for CI filesystems where native events
+            # are unreliable (e.g. NFS-backed workspaces)
+            if os.environ.get("DELTAWATCH_FORCE_POLL") == "1":
+                observer = PollingObserver(timeout=0.2)
+            else:
+                observer = Observer()
             observer.schedule(tracker, tmpdir, recursive=False)
             observer.start()
+            tracker.start(interval=0.01)
 
             try:
                 # Give observer time to start
@@ -393,24 +850,24 @@ class TestIntegration:
 
                 # Create a file
                 test_file = os.path.join(tmpdir, "integration_test.txt")
-                with open(test_file, "w") as f:
-                    f.write("integration test content")
+                Path(test_file).write_bytes(b"integration test content")
 
-                # Wait for event to be processed
-                time.sleep(1)
+                # Wake up as soon as the recorder has seen the event
+                assert tracker.wait_for_changes(timeout=5)
 
                 # Verify event was tracked
                 assert tracker.total_events > 0
 
-                # Check if either the original path or the real path is in dir_changes
+                # Check if either the original path or the real path is in dirs
                 # (handles macOS symlink case: /var -> /private/var)
                 assert (
-                    tmpdir in tracker.dir_changes or tmpdir_real in tracker.dir_changes
-                ), f"Neither {tmpdir} nor {tmpdir_real} found in {list(tracker.dir_changes.keys())}"
+                    tmpdir in tracker.dirs or tmpdir_real in tracker.dirs
+                ), f"Neither {tmpdir} nor {tmpdir_real} found in {list(tracker.dirs.keys())}"
 
             finally:
                 observer.stop()
                 observer.join(timeout=2)
+                tracker.stop()
 
 
 if __name__ == "__main__":